@@ -1,4 +1,8 @@
+import contextlib
+import sys
+
 import fret
+from fret.workspace import Accumulator
 
 import torch
 import torch.nn as nn
@@ -9,6 +13,13 @@ from sklearn.metrics import precision_recall_fscore_support
 
 from tqdm import tqdm
 
+device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+torch.backends.cudnn.benchmark = True
+
+# Inductor on CPU needs a working C++ toolchain and only fails at the first
+# forward pass without one, so compile for GPU only
+_USE_COMPILE = hasattr(torch, 'compile') and device.type == 'cuda'
+
 
 class PyTorchRuntime(fret.Runtime):
     def save(self, obj, fn):
@@ -26,22 +37,27 @@ class CNN(nn.Module):
     def __init__(self, n_classes, feature_maps=[4, 8, 16, 32, 64]):
         super().__init__()
         assert len(feature_maps) == 5
-        self.act = nn.ReLU()
         self.feature = nn.Sequential(
-            nn.Conv2d(1, 4, 3), self.act,
-            nn.Conv2d(feature_maps[0], feature_maps[1], 3), self.act,
+            nn.Conv2d(1, 4, 3), nn.ReLU(inplace=True),
+            nn.Conv2d(feature_maps[0], feature_maps[1], 3),
+            nn.ReLU(inplace=True),
             nn.MaxPool2d(2),
-            nn.Conv2d(feature_maps[1], feature_maps[2], 3), self.act,
-            nn.Conv2d(feature_maps[2], feature_maps[3], 3), self.act,
+            nn.Conv2d(feature_maps[1], feature_maps[2], 3),
+            nn.ReLU(inplace=True),
+            nn.Conv2d(feature_maps[2], feature_maps[3], 3),
+            nn.ReLU(inplace=True),
             nn.MaxPool2d(2),
-            nn.Conv2d(feature_maps[3], feature_maps[4], 3), self.act,
+            nn.Conv2d(feature_maps[3], feature_maps[4], 3),
+            nn.ReLU(inplace=True),
             nn.MaxPool2d(2)
         )
         self.out = nn.Linear(feature_maps[4], n_classes)
+        self.to(memory_format=torch.channels_last)
 
     def forward(self, x):
-        x = self.feature(x.unsqueeze(1).float() / 255.)
-        x = x.mean(dim=-1).mean(dim=-1)
+        x = x.unsqueeze(1).float() / 255.
+        x = self.feature(x.contiguous(memory_format=torch.channels_last))
+        x = x.mean(dim=(-2, -1))
         return self.out(x)
 
 
@@ -56,54 +72,77 @@ def train(ws, n_epochs=5, batch_size=64):
     logger = ws.logger('train')
 
     data, _ = load_data(False)
-    model = ws.build(n_classes=10)
+    model = ws.build(n_classes=10).to(device)
     model.train()
 
+    # MNIST is small enough to live on the device for the whole run, so
+    # batches are sliced there directly without per-batch copies
+    train_data = data.train_data.to(device)
+    train_labels = data.train_labels.to(device)
+
     optimizer = torch.optim.Adam(model.parameters())
+    net = _compile(model)
 
-    with ws.run('train') as run:
+    with _device_threads(), ws.run('train') as run:
         run.register(model)
         run.register(optimizer)
         for i in run.brange(n_epochs):
-            total_loss = run.acc(name='total_loss')
-            train_iter = run.iter(data.train_data,
-                                  data.train_labels,
+            # not registered with the run: its sum stays on the device, and
+            # a CUDA tensor in the saved states could not be resumed on a
+            # CPU-only host; after resuming, the mean covers the rest of the
+            # epoch only
+            total_loss = Accumulator()
+            train_iter = run.iter(train_data, train_labels,
                                   prefetch=True, batch_size=batch_size,
                                   name='train_iter')
-            for batch in fret.nonbreak(tqdm(train_iter,
-                                            initial=train_iter.pos)):
-                y_pred = model(batch[0])
-                loss = F.cross_entropy(y_pred, batch[1])
+            progress = tqdm(train_iter, initial=train_iter.pos,
+                            mininterval=0.5, miniters=50, smoothing=0,
+                            disable=not sys.stderr.isatty())
+            for batch in fret.nonbreak(progress):
+                x, y = _to_device(batch)
+                y_pred = net(x)
+                loss = F.cross_entropy(y_pred, y)
                 optimizer.zero_grad()
                 loss.backward()
                 optimizer.step()
-                total_loss += loss.item()
+                # stays on the device; synced once per epoch when logged
+                total_loss += loss.detach()
 
-            logger.info('epoch: %d, loss: %.4f', i, total_loss.mean())
+            logger.info('epoch: %d, loss: %.4f', i,
+                        float(total_loss.mean()))
             ws.save(model, str(i))
 
 
 @fret.command
 def test(ws, epoch, batch_size=128):
-    model = ws.load(tag=str(epoch))
+    model = ws.load(tag=str(epoch)).to(device)
     model.eval()
 
     _, data = load_data(False)
+    with _device_threads():
+        return _evaluate(_compile(model), data, batch_size, device)
+
+
+def _evaluate(model, data, batch_size, dev):
+    test_data, test_labels = _pinned(data.test_data, data.test_labels,
+                                     dev=dev)
 
     with torch.no_grad():
-        preds = []
-        trues = []
-        test_iter = fret.util.Iterator(data.test_data, data.test_labels,
+        n = len(test_data)
+        preds = torch.empty(n, dtype=torch.long, device=dev)
+        trues = torch.empty(n, dtype=torch.long, device=dev)
+        off = 0
+        test_iter = fret.util.Iterator(test_data, test_labels,
                                        prefetch=True, batch_size=batch_size)
         for batch in tqdm(test_iter):
-            y_pred = model(batch[0])
-            y_pred = y_pred.max(dim=1)[1]
-            y_true = batch[1]
-            preds.append(y_pred)
-            trues.append(y_true)
+            x, y_true = _to_device(batch, dev=dev)
+            bs = len(x)
+            torch.argmax(model(x), dim=1, out=preds[off:off + bs])
+            trues[off:off + bs].copy_(y_true)
+            off += bs
 
-        preds = torch.cat(preds)
-        trues = torch.cat(trues)
+        preds = preds.cpu().numpy()
+        trues = trues.cpu().numpy()
 
     return precision_recall_fscore_support(preds, trues, average='weighted')
 
@@ -114,3 +153,38 @@ def load_data(download=True):
     test_data = MNIST('./data/', train=False, download=True,
                       transform=ToTensor())
     return train_data, test_data
+
+
+def _compile(model):
+    # snapshots and run states keep using the uncompiled module, which
+    # shares its parameters with the compiled one
+    if not _USE_COMPILE:
+        return model
+    return torch.compile(model, mode='reduce-overhead', dynamic=False)
+
+
+@contextlib.contextmanager
+def _device_threads():
+    # while the model runs on GPU, keep the intra-op pool from competing
+    # with the iterator's prefetch thread for CPU cores
+    if device.type != 'cuda':
+        yield
+        return
+    n = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(n)
+
+
+def _pinned(*tensors, dev=device):
+    # batches sliced from pinned tensors stay pinned, so host-to-device
+    # copies can run asynchronously
+    if dev.type != 'cuda':
+        return tensors
+    return tuple(t.pin_memory() for t in tensors)
+
+
+def _to_device(batch, dev=device):
+    return [t.to(dev, non_blocking=True) for t in batch]
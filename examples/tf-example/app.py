@@ -1,3 +1,5 @@
+import json
+
 import fret
 import tensorflow as tf
 import numpy as np
@@ -5,17 +7,34 @@ import numpy as np
 tf.enable_eager_execution()
 
 
-def load_data(seq_length=100):
+def load_text():
     url = ('https://storage.googleapis.com/download.tensorflow.org/'
            'data/shakespeare.txt')
     path_to_file = tf.keras.utils.get_file('shakespeare.txt', url)
-    text = open(path_to_file).read()
-
-    vocab = sorted(set(text))
-    stoi = {u: i for i, u in enumerate(vocab)}
-    itos = list(vocab)
-
-    text_as_int = np.array([stoi[c] for c in text])
+    return open(path_to_file).read()
+
+
+def load_vocab(ws, text=None):
+    # cached in the workspace, so generation never has to parse the corpus
+    path = ws.snapshot('vocab.json')
+    if path.exists():
+        itos = json.load(path.open())
+    else:
+        if text is None:
+            text = load_text()
+        itos = sorted(set(text))
+        json.dump(itos, path.open('w'))
+    stoi = {u: i for i, u in enumerate(itos)}
+    return stoi, itos
+
+
+def load_dataset(text, stoi, seq_length=100):
+    # map characters through a code-point lookup table in one pass
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    lut = np.zeros(max(map(ord, stoi)) + 1, dtype=np.int64)
+    for c, i in stoi.items():
+        lut[ord(c)] = i
+    text_as_int = lut[codes]
 
     # Create training examples / targets
     char_dataset = tf.data.Dataset.from_tensor_slices(text_as_int)
@@ -26,9 +45,7 @@ def load_data(seq_length=100):
         target_text = chunk[1:]
         return input_text, target_text
 
-    dataset = sequences.map(split_input_target)
-
-    return dataset, stoi, itos
+    return sequences.map(split_input_target)
 
 
 @fret.configurable
@@ -38,9 +55,15 @@ class GRU(tf.keras.Model):
         if tf.test.is_gpu_available():
             rnn = tf.keras.layers.CuDNNGRU
         else:
+            # same gate layout as CuDNNGRU, so weights stay interchangeable
             import functools
             rnn = functools.partial(
-                tf.keras.layers.GRU, recurrent_activation='sigmoid')
+                tf.keras.layers.GRU,
+                activation='tanh',
+                recurrent_activation='sigmoid',
+                reset_after=True,
+                use_bias=True,
+                unroll=False)
 
         self.emb = tf.keras.layers.Embedding(
             vocab_size, emb_size,
@@ -67,7 +90,9 @@ def check(ws):
 def train(ws, batch_size=64, n_epochs=5):
     logger = ws.logger('train')
 
-    dataset, _, itos = load_data()
+    text = load_text()
+    stoi, itos = load_vocab(ws, text)
+    dataset = load_dataset(text, stoi)
     dataset = dataset \
         .shuffle(train.config.buffer_size) \
         .batch(batch_size, drop_remainder=True)
@@ -103,7 +128,7 @@ def train(ws, batch_size=64, n_epochs=5):
 
 @fret.command
 def gen(ws, start_string, num_generate=1000, temperature=1.0):
-    _, stoi, itos = load_data()
+    stoi, itos = load_vocab(ws)
 
     model = ws.build(batch_size=1, vocab_size=len(itos))
     model.build(tf.TensorShape([1, None]))
@@ -116,22 +141,31 @@ def gen(ws, start_string, num_generate=1000, temperature=1.0):
     input_eval = [stoi[s] for s in start_string]
     input_eval = tf.expand_dims(input_eval, 0)
 
-    # Empty string to store our results
-    text_generated = []
+    # Gumbel-max trick: argmax(logits + gumbel) samples from softmax(logits),
+    # so all random numbers are drawn in one kernel up front
+    uniform = tf.random.uniform([num_generate, len(itos)],
+                                minval=np.finfo(np.float32).tiny, maxval=1.)
+    gumbel = -tf.math.log(-tf.math.log(uniform))
+
+    # traced once and replayed as a graph, instead of dispatching every
+    # op from Python on each step
+    @tf.function(input_signature=[tf.TensorSpec([1, None], tf.int32),
+                                  tf.TensorSpec([len(itos)], tf.float32)])
+    def step(inp, noise):
+        predictions = model(inp)
+        logits = predictions[0, -1] / temperature
+        predicted_id = tf.argmax(logits + noise, output_type=tf.int32)
+        return tf.reshape(predicted_id, [1, 1])
+
+    # keep generated ids on device; fetch them all at once at the end
+    generated = []
 
     model.reset_states()
 
-    for _ in range(num_generate):
-        predictions = model(input_eval)
-        # remove the batch dimension
-        predictions = tf.squeeze(predictions, 0)
-
-        predictions = predictions / temperature
-        predicted_id = tf.random.categorical(predictions, num_samples=1)
-        predicted_id = predicted_id[-1, 0].numpy()
-
-        input_eval = tf.expand_dims([predicted_id], 0)
+    for i in range(num_generate):
+        input_eval = step(input_eval, gumbel[i])
+        generated.append(input_eval)
 
-        text_generated.append(itos[predicted_id])
+    text_generated = [itos[c] for c in tf.concat(generated, 1)[0].numpy()]
 
     return (start_string + ''.join(text_generated))
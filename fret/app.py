@@ -2,66 +2,90 @@ import os
 import sys
 import pathlib
 import importlib
-import toml
+import importlib.util
 
 from .common import NoAppError, commands
 from .util import _dict, Configuration
 
 
-# load configuration
-_p = pathlib.Path().absolute()
-if _p.joinpath('fret.toml').exists():
-    _path = _p
-else:
-    while _p != _p.parent:
-        if _p.joinpath('fret.toml').exists():
-            _path = _p
-            break
-        _p = _p.parent
-    else:
-        _path = pathlib.Path().absolute()
+def _parse_toml(s):
+    # prefer the faster tomllib (stdlib) and tomli, fall back to ``toml``
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            import toml
+            return toml.loads(s)
+    return tomllib.loads(s)
+
+
+# load configuration: search upwards for fret.toml, falling back to cwd
+_cwd = os.getcwd()
+_p = _cwd
+_found = False
+while True:
+    if os.path.isfile(os.path.join(_p, 'fret.toml')):
+        _found = True
+        break
+    _parent = os.path.dirname(_p)
+    if _parent == _p:
+        _p = _cwd
+        break
+    _p = _parent
+_path = pathlib.Path(_p)
 
-root = str(_path)
+root = _p
 
 _cfg_path = _path / 'fret.toml'
-if _cfg_path.exists():
-    _cfg = toml.load(_cfg_path.open())
+if _found:
+    _cfg = _parse_toml(_cfg_path.read_bytes().decode('utf-8'))
 else:
     _cfg = _dict()
 config = Configuration(_cfg)
 
-# import modules
+# import modules, with root on sys.path only while doing so
 sys.path.insert(0, root)
-appname = os.environ.get('FRETAPP')
-_module = None
+try:
+    appname = os.environ.get('FRETAPP')
+    _module = None
 
-if appname is not None:
-    _module = importlib.import_module(appname)
-elif 'appname' in config:
-    _module = importlib.import_module(config.appname)
-else:
-    for appname in ['main', 'app']:
-        try:
-            _module = importlib.import_module(appname)
-            break
-        except ImportError as _e:
-            if _e.name != appname:
-                sys.path.remove(root)
-                raise
+    if appname is not None:
+        _module = importlib.import_module(appname)
+    elif 'appname' in config:
+        _module = importlib.import_module(config.appname)
     else:
-        sys.path.remove(root)
-        raise NoAppError('cannot find app to import')
+        for appname in ('main', 'app'):
+            # probe first, so that a missing candidate costs no ImportError
+            if importlib.util.find_spec(appname) is not None:
+                _module = importlib.import_module(appname)
+                break
+        else:
+            raise NoAppError('cannot find app to import')
+
+    if 'import_modules' in config:
+        for m in config.import_modules:
+            importlib.import_module(m)
+finally:
+    sys.path.remove(root)
+
+
+# expose commands, looked up on access so that commands registered later
+# are found as well
+def __getattr__(name):
+    try:
+        return commands[name]
+    except KeyError:
+        raise AttributeError(name) from None
 
-if 'import_modules' in config:
-    for m in config.import_modules:
-        importlib.import_module(m)
 
-sys.path.remove(root)
+def __dir__():
+    return sorted(set(globals()) | set(commands))
 
 
-# expose commands
-for _name, _cmd in commands.items():
-    globals()[_name] = _cmd
-del _name, _cmd
+if sys.version_info < (3, 7):
+    # no module __getattr__ (PEP 562), bind the commands known by now
+    globals().update(commands)
 
 __all__ = ['root', 'config']
@@ -1,9 +1,10 @@
 import argparse
-import collections
+import functools
 import logging
-import shutil
+import operator
 import sys
 import os
+import traceback
 
 from .common import command, argspec, commands, configurables, \
     NoAppError, NotConfiguredError
@@ -11,16 +12,30 @@ from .workspace import Workspace
 from .util import colored, ColoredFormatter, Configuration
 
 
+_logger = logging.getLogger('fret')
+_handler = None
+
+
 def main(args=None):
-    logger = logging.getLogger('fret')
+    global _handler  # pylint: disable=global-statement
+    logger = _logger
     logger.setLevel(logging.INFO)
-    formatter = ColoredFormatter(
-        '%(levelname)s %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if _handler is None:
+        # installed once, so that repeated calls don't duplicate output
+        if sys.stderr.isatty():
+            formatter = ColoredFormatter(
+                '%(levelname)s %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+        else:
+            # no colors when piped; keep the same one-letter level prefix
+            formatter = logging.Formatter(
+                '%(levelname).1s %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+        _handler = logging.StreamHandler()
+        _handler.setFormatter(formatter)
+        logger.addHandler(_handler)
 
     try:
         from . import app
@@ -78,18 +93,27 @@ def main(args=None):
         ws = None
     main = None
 
+    # only the invoked command gets its arguments built; the others are
+    # added with their help text alone, which is all listings need
+    selected = next((a for a in remaining if not a.startswith('-')), None)
+    selected_f = None
+
+    main_cls = None
+    if ws is not None:
+        try:
+            # pylint: disable=protected-access
+            main_cls = ws._try_get_module()[0]
+        except NotConfiguredError:
+            pass
+
     subparsers = main_parser.add_subparsers(title='supported commands',
                                             dest='command')
     subparsers.required = True
 
     for cmd, f in commands.items():
         if f.__functype__ == 'method':
-            if ws is None:
-                continue
             cls_name, func_name = cmd.split('.')
-            if main is None:
-                main = ws.build()
-            if cls_name != main.__class__.__name__:
+            if cls_name != main_cls:
                 # not applicable
                 continue
             cmd = func_name
@@ -100,38 +124,46 @@ def main(args=None):
             description=getattr(f, '__desc__', None),
             formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 
-        with ParserBuilder(sub, argument_style) as builder:
-            for arg in f.__funcspec__.pos[int(not f.__static__):]:
-                builder.add_opt(arg, argspec())
-            for k, v in f.__funcspec__.kw:
-                builder.add_opt(k, v)
+        if cmd != selected:
+            continue
 
-        if f.__functype__ == 'method':
-            sub.set_defaults(func=_default_func(f, main))
-        else:
-            sub.set_defaults(func=_default_func(f, Workspace(ws_path)))
+        for a, kw in _command_arg_specs(f, argument_style):
+            sub.add_argument(*a, **kw)
+        selected_f = f
 
     if app is not None:
         config_sub = subparsers.add_parser(
             'config', help='configure module for workspace',
             formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-        _add_config_sub(config_sub, argument_style)
-        config_sub.set_defaults(func=_config_default_func)
+        if selected == 'config':
+            _add_config_sub(config_sub, argument_style, remaining)
+            config_sub.set_defaults(func=_config_default_func)
     else:
         config_sub = None
 
     args = main_parser.parse_args(remaining)
+
+    if selected_f is not None and args.command == selected:
+        # bound after parsing, so that -h or a usage error never builds the
+        # module
+        if selected_f.__functype__ == 'method':
+            main = ws.build()
+            args.func = _default_func(selected_f, main)
+        else:
+            if ws is None:
+                ws = Workspace(ws_path)
+            args.func = _default_func(selected_f, ws)
+
     del args.q
     del args.v
     args.workspace = ws_path
 
-    logger = logging.getLogger('fret.' + args.command)
+    logger = logger.getChild(args.command)
 
     try:
         return args.func(args)
     except KeyboardInterrupt:
         # print traceback info to screen only
-        import traceback
         sys.stderr.write(traceback.format_exc())
         logger.warning('cancelled by user')
     except NotConfiguredError as e:
@@ -141,7 +173,6 @@ def main(args=None):
         sys.exit(1)
     except Exception as e:  # pylint: disable=broad-except
         # print traceback info to screen only
-        import traceback
         sys.stderr.write(traceback.format_exc())
         logger.error('exception occurred: %s: %s',
                      e.__class__.__name__, e)
@@ -158,6 +189,8 @@ class _ArgumentParser(argparse.ArgumentParser):
 class ParserBuilder:
     """Utility to generate CLI arguments in different styles."""
 
+    __slots__ = ['_parser', '_style', '_names', '_spec']
+
     def __init__(self, parser, style='java'):
         self._parser = parser
         self._style = style
@@ -182,6 +215,13 @@ class ParserBuilder:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        for args, kwargs in self.specs():
+            self._parser.add_argument(*args, **kwargs)
+
+    def specs(self):
+        """Get ``(args, kwargs)`` for :meth:`add_argument` of each option
+        added so far."""
+        specs = []
         prefix = '-' if self._style == 'java' else '--'
         seen = set(self._names)
         for name, spec in zip(self._names, self._spec):
@@ -190,7 +230,7 @@ class ParserBuilder:
             args, kwargs = spec.spec()
             if not args:
                 args = [prefix + name]
-                short = ''.join(seg[0] for seg in name.split('_'))
+                short = _short_for(name)
                 if short not in seen:
                     args.append('-' + short)
                     seen.add(short)
@@ -198,74 +238,117 @@ class ParserBuilder:
                 kwargs['dest'] = name
             if 'help' not in kwargs:
                 kwargs['help'] = 'parameter ' + name
-            self._parser.add_argument(*args, **kwargs)
+            specs.append((args, kwargs))
+        return specs
+
+
+@functools.lru_cache(maxsize=1024)
+def _short_for(name):
+    """Short alias of option ``name``, e.g. ``ls`` for ``learning_step``."""
+    if '_' in name:
+        # slicing tolerates empty segments, e.g. from 'a__b'
+        return ''.join(seg[:1] for seg in name.split('_'))
+    return name[0]
+
+
+_command_specs = {}
+
+
+def _command_arg_specs(f, style):
+    """Get argument specifications of command ``f``. They only depend on the
+    function and argument style, so they are built once and reused."""
+    key = (f, style)
+    if key not in _command_specs:
+        builder = ParserBuilder(None, style)
+        for arg in f.__funcspec__.pos[int(not f.__static__):]:
+            builder.add_opt(arg, argspec())
+        for k, v in f.__funcspec__.kw:
+            builder.add_opt(k, v)
+        _command_specs[key] = builder.specs()
+    return _command_specs[key]
+
+
+_module_specs = {}
+
+
+def _module_arg_specs(module_cls, style):
+    """Get configuration argument specifications of ``module_cls``, built
+    once per argument style like those of commands."""
+    key = (module_cls, style)
+    if key not in _module_specs:
+        builder = ParserBuilder(None, style)
+        mro = []
+        for base_cls in module_cls.__mro__:
+            mro.append(base_cls)
+            if (
+                not hasattr(base_cls, '__funcspec__') or
+                not base_cls.__funcspec__.varkw
+            ):
+                break
+        for base_cls in reversed(mro):
+            if hasattr(base_cls, '__funcspec__'):
+                for name, opt in base_cls.__funcspec__.kw:
+                    builder.add_opt(name, opt)
+        for submodule in module_cls.submodules:
+            builder.add_opt(submodule, argspec(
+                default=submodule,
+                help='submodule ' + submodule
+            ))
+        _module_specs[key] = builder.specs()
+    return _module_specs[key]
 
 
 def _default_func(f, obj):
     def run(args):
-        del args.command, args.func, args.workspace
-        args = {name: value for (name, value) in args._get_kwargs()}
-        args = Configuration(args)
+        kwargs = {name: value for name, value in vars(args).items()
+                  if name not in ('command', 'func', 'workspace')}
 
         if f.__static__:
-            return f(**args._dict())
+            return f(**kwargs)
         else:
-            return f(obj, **args._dict())
+            return f(obj, **kwargs)
     return run
 
 
-def _add_config_sub(parser, argument_style):
+def _add_config_sub(parser, argument_style, argv=()):
     parser.add_argument('name', default='main', nargs='?',
                         help='module name')
+    if not configurables:
+        # nothing to configure, only showing the configuration is supported
+        return
     if sys.version_info < (3, 7):
         subs = parser.add_subparsers(title='modules available',
                                      dest='module')
     else:
         subs = parser.add_subparsers(title='modules available',
                                      dest='module', required=False)
-    group_options = collections.defaultdict(set)
+    group_options = {}
 
     for module, module_cls in configurables.items():
         _parser_formatter = argparse.ArgumentDefaultsHelpFormatter
         sub = subs.add_parser(module, help=module_cls.help,
                               formatter_class=_parser_formatter)
+        if module not in argv:
+            # not being configured, so the options are not needed
+            continue
         group = sub.add_argument_group('config')
-
-        with ParserBuilder(group, argument_style) as builder:
-            mro = []
-            for base_cls in module_cls.__mro__:
-                mro.append(base_cls)
-                if (
-                    not hasattr(base_cls, '__funcspec__') or
-                    not base_cls.__funcspec__.varkw
-                ):
-                    break
-            for base_cls in reversed(mro):
-                if hasattr(base_cls, '__funcspec__'):
-                    for name, opt in base_cls.__funcspec__.kw:
-                        builder.add_opt(name, opt)
-            for submodule in module_cls.submodules:
-                builder.add_opt(submodule, argspec(
-                    default=submodule,
-                    help='submodule ' + submodule
-                ))
-        for action in group._group_actions:
-            group_options[module].add(action.dest)
+        for a, kw in _module_arg_specs(module_cls, argument_style):
+            group.add_argument(*a, **kw)
+        group_options[module] = frozenset(
+            action.dest for action in group._group_actions)
 
         def save(args):
             with Workspace(args.workspace) as ws:
                 m = args.module
-                cfg = [(name, value)
-                       for (name, value) in args._get_kwargs()
-                       if name in group_options[m]]
-                cfg = Configuration(cfg)
+                opts = group_options[m]
+                cfg = {name: value for name, value in vars(args).items()
+                       if name in opts}
                 msg = '[%s] configured "%s" as "%s"' % \
                     (ws, args.name, m)
-                if cfg._config:
-                    msg += ' with: ' + str(cfg)
+                if cfg:
+                    msg += ' with: ' + str(Configuration(cfg))
                 print(msg, file=sys.stderr)
-                ws.register(args.name, configurables[m],
-                            **cfg._dict())
+                ws.register(args.name, configurables[m], **cfg)
 
         sub.set_defaults(func=save)
 
@@ -295,13 +378,11 @@ def fork(ws, path, mods=([], 'modifications (in format: NAME.ARG=VAL)')):
     conf = ws.config_dict()
     for mod in mods:
         k, v = mod.split('=')
-        d = conf
         if '.' not in k:
             k = 'main.' + k
         fields = k.split('.')
         try:
-            for field in fields[:-1]:
-                d = d[field]
+            d = functools.reduce(operator.getitem, fields[:-1], conf)
             d[fields[-1]]  # try get last field
         except KeyError as e:
             print('{}: no such key to modify'.format(e.args[0]))
@@ -342,23 +423,23 @@ def clean(ws,
                 return 1
             if c.lower() != 'y':
                 return 1
-        shutil.rmtree(str(ws))
+        _rmtree(ws.path)
     else:
+        if everything:
+            todo = ['snapshots', 'logs']
+            if config:
+                todo.append('config')
+        else:
+            todo = []
+            if snapshot:
+                todo.append('snapshots')
+            if log:
+                todo.append('logs')
+            if config:
+                todo.append('config')
+            if len(todo) == 0:
+                todo.append('snapshots')
         if not force:
-            if everything:
-                todo = ['snapshots', 'logs']
-                if config:
-                    todo.append('config')
-            else:
-                todo = []
-                if snapshot:
-                    todo.append('snapshots')
-                if log:
-                    todo.append('logs')
-                if config:
-                    todo.append('config')
-                if len(todo) == 0:
-                    todo.append('snapshots')
             msg = '[{}] clean {}? [y/N] '.format(ws, ', '.join(todo))
             try:
                 c = input(msg)
@@ -366,15 +447,25 @@ def clean(ws,
                 return 1
             if c.lower() != 'y':
                 return 1
-        if (not config and not log) or snapshot or everything:
-            # fret clean or fret clean -s ... or fret clean -a ...
-            shutil.rmtree(str(ws.snapshot()))
 
-        if log or everything:
-            shutil.rmtree(str(ws.log()))
+        # remove the directories directly instead of through ws.snapshot()
+        # and ws.log(), which would create them first
+        if 'snapshots' in todo:
+            _rmtree(ws.path / 'snapshot')
+
+        if 'logs' in todo:
+            _rmtree(ws.path / 'log')
 
-        if config:
+        if 'config' in todo:
             try:
                 (ws.path / 'config.toml').unlink()
             except FileNotFoundError:
                 pass
+
+
+def _rmtree(path):
+    import shutil  # only needed here, and slow to import
+    try:
+        shutil.rmtree(str(path))
+    except FileNotFoundError:
+        pass
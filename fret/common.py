@@ -43,6 +43,14 @@ class Module:
         return self.__class__.__name__ + '(' + str(self.config) + ')'
 
 
+# Module members copied onto configurables, leaving out the bookkeeping
+# attributes of a class body, and help, which is set per class
+_class_internals = frozenset(['__dict__', '__weakref__', '__module__',
+                              '__doc__', '__init__', 'help'])
+_module_members = tuple((k, v) for k, v in Module.__dict__.items()
+                        if k not in _class_internals)
+
+
 class Plugin:
     """Interface for external plugin
 
@@ -59,15 +67,16 @@ class argspec:
     """In control of the behavior of commands. Replicates arguments for
     :meth:`argparse.ArgumentParser.add_argument`."""
 
-    __slots__ = ['_args', '_kwargs', '_params']
+    __slots__ = ['_args', '_kwargs', '_params', '_default']
 
     def __init__(self, *args, **kwargs):
         self._args = args
         self._kwargs = kwargs
         self._params = None
+        self._default = kwargs.get('default')
 
     def default(self):
-        return self._kwargs.get('default')
+        return self._default
 
     def spec(self):
         return self._args, self._kwargs
@@ -86,29 +95,41 @@ class argspec:
         else:
             kwargs['default'] = param
 
-        if isinstance(kwargs['default'], list):
-            if kwargs['default']:
-                kwargs['nargs'] = '+'
-                kwargs['type'] = type(kwargs['default'][0])
-            else:
-                kwargs['nargs'] = '*'
-        elif isinstance(kwargs['default'], bool):
-            if kwargs['default']:
-                kwargs['action'] = 'store_false'
-            else:
-                kwargs['action'] = 'store_true'
-        elif kwargs['default'] is not None:
-            kwargs['type'] = type(kwargs['default'])
+        default = kwargs['default']
+        handler = _param_handlers.get(type(default))
+        if handler is not None:
+            handler(kwargs, default)
+        elif default is not None:
+            kwargs['type'] = type(default)
 
         obj = cls(**kwargs)
         obj._params = param  # pylint: disable=protected-access
         return obj
 
 
+def _list_param(kwargs, default):
+    if default:
+        kwargs['nargs'] = '+'
+        kwargs['type'] = type(default[0])
+    else:
+        kwargs['nargs'] = '*'
+
+
+def _bool_param(kwargs, default):
+    if default:
+        kwargs['action'] = 'store_false'
+    else:
+        kwargs['action'] = 'store_true'
+
+
+# argument options derived from the type of a default value
+_param_handlers = {list: _list_param, bool: _bool_param}
+
+
 class funcspec:
     """Utility to generate argument specification from function signature."""
 
-    __slots__ = ['pos', 'kw', 'kw_only', 'varkw']
+    __slots__ = ['pos', 'kw', 'kw_only', 'varkw', '_defaults']
 
     def __init__(self, f):
         spec = ins.getfullargspec(f)
@@ -125,24 +146,51 @@ class funcspec:
             self.kw_only = True
             self.pos = spec.args
             if spec.kwonlydefaults:
-                self.kw = list(spec.kwonlydefaults.items())
+                self.kw = [(k, v if isinstance(v, argspec)
+                            else argspec.from_param(v))
+                           for k, v in spec.kwonlydefaults.items()]
             else:
                 self.kw = []
+        self._defaults = dict((k, v.default()) for k, v in self.kw)
 
     def get_call_args(self, *args, **kwargs):
-        defaults = dict((k, v.default()) for k, v in self.kw)
+        defaults = self._defaults.copy()
         if not self.kw_only:
             if len(args) > len(self.pos):
                 n_other = len(args) - len(self.pos)
-                defaults.update(dict([(self.kw[i][0], args[i - n_other])
-                                      for i in range(n_other)]))
+                for i in range(n_other):
+                    defaults[self.kw[i][0]] = args[i - n_other]
                 args = args[:-n_other]
-        defaults.update(dict([(k, v.default()) for k, v in self.kw]))
         defaults.update(kwargs)
         cfg = list(zip(self.pos, args)) + list(defaults.items())
         return args, defaults, cfg
 
 
+@functools.lru_cache(maxsize=None)
+def _get_funcspec(f):
+    """Cached :class:`funcspec` of ``f``, so that it is inspected only once."""
+    return funcspec(f)
+
+
+def _empty_state_dict(sf, *args, **kwargs):
+    # pylint: disable=unused-argument
+    return dict()
+
+
+def _ignore_state_dict(sf, state, *args, **kwargs):
+    # pylint: disable=unused-argument
+    pass
+
+
+def _redefines(old, new):
+    """Whether ``new`` is the same definition as registered ``old``, only
+    executed again (e.g. module reloaded, or ``%run`` in a notebook)."""
+    if old is new or getattr(old, '__wrapped__', None) is new:
+        return False  # the very same object, decorated twice
+    return old.__module__ == new.__module__ and \
+        old.__qualname__ == new.__qualname__
+
+
 def configurable(wraps=None, submodules=None, build_subs=True, states=None):
     """Class decorator that registers configurable module under current app.
 
@@ -156,13 +204,15 @@ def configurable(wraps=None, submodules=None, build_subs=True, states=None):
     def wrapper(cls):
         if not ins.isclass(cls):
             raise TypeError('only class can be configurable')
-        if cls.__name__ in configurables:
+        if '__funcspec__' in cls.__dict__ or (
+                cls.__name__ in configurables and
+                not _redefines(configurables[cls.__name__], cls)):
             raise DuplicationError(
                 'configurable module %s already registered',
                 cls.__name__
             )
         orig_init = cls.__init__
-        spec = funcspec(orig_init)
+        spec = _get_funcspec(orig_init)
 
         if submodules is not None:
             if isinstance(submodules, str):
@@ -170,24 +220,25 @@ def configurable(wraps=None, submodules=None, build_subs=True, states=None):
             else:
                 setattr(cls, 'submodules', submodules)
 
-        orig_state_dict = getattr(cls, 'state_dict', lambda _: dict())
+        orig_state_dict = getattr(cls, 'state_dict', _empty_state_dict)
         orig_load_state_dict = getattr(cls, 'load_state_dict',
-                                       lambda *_: None)
+                                       _ignore_state_dict)
 
-        def state_dict(sf, *args, **kwargs):
-            if states:
+        if states:
+            def state_dict(sf, *args, **kwargs):
                 d = {s: getattr(sf, s) for s in states}
-            else:
-                d = dict()
-            d.update(orig_state_dict(sf, *args, **kwargs))
-            return d
+                d.update(orig_state_dict(sf, *args, **kwargs))
+                return d
 
-        def load_state_dict(sf, state, *args, **kwargs):
-            if states:
+            def load_state_dict(sf, state, *args, **kwargs):
                 for s in states:
                     setattr(sf, s, state[s])
                     del state[s]
-            orig_load_state_dict(sf, state, *args, **kwargs)
+                orig_load_state_dict(sf, state, *args, **kwargs)
+        else:
+            # nothing to add, use the original ones as is
+            state_dict = orig_state_dict
+            load_state_dict = orig_load_state_dict
 
         def new_init(sf, *args, **kwargs):
             # get config from signature
@@ -197,10 +248,14 @@ def configurable(wraps=None, submodules=None, build_subs=True, states=None):
                 Module.__init__(sf, **d)
             orig_init(*args, **kwargs)
 
-        # inherit Module methods
-        for k, v in Module.__dict__.items():
-            if k != '__dict__' and k not in cls.__dict__:
+        # inherit Module methods (Module cannot simply be added as a base:
+        # CPython refuses __bases__ assignment for classes based on object)
+        for k, v in _module_members:
+            if k not in cls.__dict__:
                 setattr(cls, k, v)
+        if 'help' not in cls.__dict__:
+            # what Module.help gives, but fixed as a plain class attribute
+            setattr(cls, 'help', 'module ' + cls.__name__)
         setattr(cls, '__init__', new_init)
         setattr(cls, 'state_dict', state_dict)
         setattr(cls, 'load_state_dict', load_state_dict)
@@ -222,7 +277,7 @@ def command(wraps=None, help=None, description=None):
             raise TypeError('only function can form command')
         name = f.__name__
 
-        spec = funcspec(f)
+        spec = _get_funcspec(f)
         ftype = 'function'
         if spec.pos and (spec.pos[0] == 'ws' or spec.pos[0] == 'self'):
             static = False
@@ -235,19 +290,21 @@ def command(wraps=None, help=None, description=None):
             cls_name = f.__qualname__.split('.')[0]
             name = cls_name + '.' + name
 
-        if name in commands:
+        if hasattr(f, '__funcspec__') or (
+                name in commands and not _redefines(commands[name], f)):
             raise DuplicationError('command %s already registered', name)
 
+        n_skip = int(not static)  # ws/self is not part of the config
+
         @functools.wraps(f)
         def new_f(*args, **kwargs):
             args, kwargs, cfg = spec.get_call_args(*args, **kwargs)
-            if hasattr(new_f, 'global_config'):
-                d = new_f.global_config.copy()
-                d.update(dict(cfg[int(not static):]))
+            cfg = cfg[n_skip:]
+            global_config = getattr(new_f, 'global_config', None)
+            if global_config is not None:
+                d = global_config.copy()
+                d.update(cfg)
                 cfg = d
-            else:
-                d = dict(cfg[int(not static):])
-            cfg = cfg[int(not static):]
             new_f.config = Configuration(cfg)
             return f(*args, **kwargs)
 
@@ -47,7 +47,8 @@ class Configuration:
         return self._config[key]
 
     def __getattr__(self, key):
-        if key == '__setstate__':
+        if key.startswith('__') and key.endswith('__'):
+            # protocol probes (pickle, copy, ...), never configuration
             raise AttributeError(key)
         if key not in self._config:
             raise AttributeError(key)
@@ -177,14 +178,14 @@ class ColoredFormatter(logging.Formatter):
         'ERROR': 'r'
     }
 
+    _COLORED_LEVELS = {
+        level: colored(level[0], color, style='b')
+        for level, color in _LOG_COLORS.items()
+    }
+
     def format(self, record):
-        levelname = record.levelname
-        if levelname in self._LOG_COLORS:
-            record.levelname = colored(
-                record.levelname[0],
-                self._LOG_COLORS[record.levelname],
-                style='b'
-            )
+        record.levelname = self._COLORED_LEVELS.get(record.levelname,
+                                                    record.levelname)
         return logging.Formatter.format(self, record)
 
 
@@ -5,8 +5,6 @@ import logging
 import pathlib
 import pickle
 
-import toml
-
 from .common import configurables, plugins, NotConfiguredError
 from .util import Configuration, stateful, Iterator, date_str
 
@@ -22,6 +20,7 @@ class Workspace:
 
         conf = None
         if self.config_path.exists():
+            import toml
             conf = toml.load(self.config_path.open())
         if config_dict is not None:
             if conf is None:
@@ -104,6 +103,7 @@ class Workspace:
 
     def write(self):
         """Save module configuration of this workspace to file."""
+        import toml
         toml.dump(self.config_dict(), self.config_path.open('w'))
 
     def __enter__(self):
@@ -384,6 +384,8 @@ class Range:
 
 class Builder:
     """Class for building a specific module, with preset ws configuration."""
+    __slots__ = ['ws', '_name']
+
     def __init__(self, ws, name):
         self.ws = ws
         self._name = name
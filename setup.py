@@ -38,6 +38,7 @@ setup(
     python_requires='>=3.4',
     install_requires=[
         'toml',
+        'tomli; python_version >= "3.7" and python_version < "3.11"',
     ],
     tests_require=test_deps,
     extras_require={
@@ -1,7 +1,9 @@
 import importlib
 import os
+import sys
 
 from fret.cli import main
+from fret.common import commands, configurables
 import py
 import pytest
 
@@ -71,6 +73,30 @@ class Model:
         self.weight = 23
 '''
 
+code5 = '''
+import fret
+
+builds = []
+
+@fret.configurable
+class Model:
+    def __init__(self, x=3):
+        builds.append(self)
+
+    @fret.command
+    def fit(self, epochs=1):
+        return self.config.x, epochs
+
+@fret.configurable
+class Other:
+    def __init__(self, a=1):
+        ...
+
+@fret.command
+def show(ws):
+    return 'show'
+'''
+
 
 def test_main(tmpdir: py.path.local, caplog):
     with pytest.raises(SystemExit):
@@ -174,3 +200,85 @@ def test_main(tmpdir: py.path.local, caplog):
     # model = main('run'.split())
     # del os.environ['FRETAPP']
     # assert model.config.x == 3
+
+
+def _load_app(appdir, code, monkeypatch):
+    with appdir.join('main.py').open('w') as f:
+        f.write(code)
+    monkeypatch.chdir(str(appdir))
+    sys.modules.pop('main', None)
+    import fret.app
+    importlib.reload(fret.app)
+
+
+def _restore_registry(saved_configurables, saved_commands):
+    configurables.clear()
+    configurables.update(saved_configurables)
+    commands.clear()
+    commands.update(saved_commands)
+
+
+def test_help(tmpdir: py.path.local, capsys, monkeypatch):
+    saved = dict(configurables), dict(commands)
+    try:
+        appdir = tmpdir.join('appdir_help')
+        appdir.mkdir()
+        _load_app(appdir, code1, monkeypatch)
+
+        with pytest.raises(SystemExit):
+            main(['-h'])
+        out = capsys.readouterr().out
+        assert 'supported commands' in out
+        assert 'None' not in out.split()
+
+        with pytest.raises(SystemExit):
+            main('config -h'.split())
+        out = capsys.readouterr().out
+        assert 'modules available' in out
+        assert 'None' not in out.split()
+    finally:
+        _restore_registry(*saved)
+
+
+def test_dispatch(tmpdir: py.path.local, capsys, monkeypatch):
+    saved = dict(configurables), dict(commands)
+    try:
+        appdir = tmpdir.join('appdir_dispatch')
+        appdir.mkdir()
+        with appdir.join('fret.toml').open('w') as f:
+            f.write('argument_style = "gnu"\n')
+        _load_app(appdir, code5, monkeypatch)
+        builds = sys.modules['main'].builds
+
+        # method commands are only offered once their module is configured
+        with pytest.raises(SystemExit):
+            main(['-h'])
+        out = capsys.readouterr().out
+        for cmd in ['show', 'config', 'fork', 'clean']:
+            assert cmd in out
+        assert 'fit' not in out
+
+        main('config Model'.split())
+        capsys.readouterr()
+
+        with pytest.raises(SystemExit):
+            main(['-h'])
+        out = capsys.readouterr().out
+        for cmd in ['fit', 'show', 'config', 'fork', 'clean']:
+            assert cmd in out
+
+        # the module is only built for the method command being invoked
+        assert main(['show']) == 'show'
+        assert not builds
+        assert main('fit --epochs 5'.split()) == (3, 5)
+        assert len(builds) == 1
+        assert main(['-q', 'fit']) == (3, 1)
+
+        # options are built for the module named on the command line only
+        with pytest.raises(SystemExit):
+            main('config Model -h'.split())
+        out = capsys.readouterr().out
+        assert '--x' in out
+        assert '--a' not in out
+    finally:
+        _restore_registry(*saved)
@@ -40,10 +40,62 @@ class D:
 def test_module():
     c = D(A())
     assert c.sub.config == {'a': 0}
+    assert A(5).config == {'a': 5}
     with pytest.raises(fret.common.NoWorkspaceError):
         _ = c.ws
 
 
+def test_register():
+    # noinspection PyUnusedLocal
+    def define():
+        class R:
+            def __init__(self, r=0):
+                pass
+        return R
+
+    try:
+        # executing the same definition again replaces the registered one
+        fret.configurable(define())
+        cls = fret.configurable(define())
+        assert fret.common.configurables['R'] is cls
+
+        # noinspection PyUnusedLocal
+        class R:
+            def __init__(self, r=0):
+                pass
+
+        with pytest.raises(fret.common.DuplicationError):
+            fret.configurable(R)
+    finally:
+        fret.common.configurables.pop('R', None)
+
+
+def test_register_twice():
+    # noinspection PyUnusedLocal
+    class R:
+        def __init__(self, r=0):
+            pass
+
+    def f(ws, n=1):
+        return n
+
+    try:
+        fret.configurable(R)
+        with pytest.raises(fret.common.DuplicationError):
+            fret.configurable(R)
+        assert R.__funcspec__.kw[0][0] == 'r'
+
+        new_f = fret.command(f)
+        with pytest.raises(fret.common.DuplicationError):
+            fret.command(new_f)
+        with pytest.raises(fret.common.DuplicationError):
+            fret.command(f)
+        assert fret.common.commands['f'] is new_f
+    finally:
+        fret.common.configurables.pop('R', None)
+        fret.common.commands.pop('f', None)
+
+
 def test_workspace(tmpdir: py.path.local):
     # reproducibility and persistency
     # rules:
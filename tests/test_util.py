@@ -1,3 +1,5 @@
+import logging
+
 import fret.util
 
 
@@ -22,6 +24,7 @@ def test_configuration():
     conf = C([('section1', conf._dict()), ('section2', {'foo': 'bar'})])
     assert conf.section1.x == 3
     assert conf.section2.foo == 'bar'
+    assert not hasattr(conf, '__wrapped__')
 
 
 def test_colored():
@@ -35,6 +38,15 @@ def test_colored():
         '\x1b[1;31mhello\x1b[0m'
 
 
+def test_colored_formatter():
+    formatter = fret.util.ColoredFormatter('%(levelname)s %(message)s')
+    record = logging.LogRecord('fret', logging.WARNING, __file__, 0,
+                               'hello', None, None)
+    assert formatter.format(record) == '\x1b[1;33mW\x1b[0m hello'
+    # formatting the same record again must not color it twice
+    assert formatter.format(record) == '\x1b[1;33mW\x1b[0m hello'
+
+
 def test_classproperty():
     class A:
         @fret.util.classproperty